@@ -1,4 +1,5 @@
 import os
+from functools import cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -11,12 +12,19 @@ class Settings(BaseSettings):
     # Fathom API
     FATHOM_API_KEY: str = Field(..., description="Fathom API key")
     FATHOM_API_URL: str = "https://api.fathom.ai/external/v1"
+    FATHOM_FETCH_CONCURRENCY: int = Field(5, ge=1)
+    # Meetings listing only asks for meetings created after the last sync
+    # minus this window (covers clock skew and long cycles)
+    FATHOM_LISTING_LOOKBACK_HOURS: int = 24
 
     # Google Service Account (optional — used if file exists)
     GOOGLE_SERVICE_ACCOUNT_FILE: str = "service_account.json"
 
     # Google Drive
     GOOGLE_DRIVE_FOLDER_ID: str = "14ettD6eiSSWcPUigY9z_GtltB4MlChiH"
+    # Store transcripts as gzip-compressed .txt.gz (smaller uploads, but
+    # Drive can't preview them)
+    GOOGLE_DRIVE_GZIP_UPLOADS: bool = False
 
     # Google Sheets
     GOOGLE_SHEET_ID: str = "1RU4LaFKIxIWPzcFzCABf54wzmhoHvf16R1t8WhRYbY0"
@@ -46,5 +54,10 @@ class Settings(BaseSettings):
         return path
 
 
-settings = Settings()
-settings.ensure_dirs()
+@cache
+def get_settings() -> Settings:
+    """
+    Build Settings on first use (env + .env are read then, not at import).
+    Directory creation is left to the entrypoint via ensure_dirs().
+    """
+    return Settings()
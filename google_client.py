@@ -1,12 +1,18 @@
 import os
 import io
+import gzip
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-from config import settings
+from googleapiclient.http import MediaIoBaseUpload, build_http
+from config import get_settings
 from logger import logger
 
 SCOPES = [
@@ -33,11 +39,43 @@ def _find_token_path() -> str | None:
     return None
 
 
+def _write_token(path: str, creds) -> None:
+    """
+    Write token JSON atomically so an interrupted write can't corrupt it.
+    The temp file is created owner-only, since it replaces a file holding a
+    refresh token.
+    """
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(creds.to_json())
+    os.replace(tmp, path)
+
+
 class GoogleClient:
+    MAX_UPLOAD_WORKERS = 4
+    # Payloads above this go through a chunked resumable session; smaller
+    # ones are a single multipart POST (resumable costs an extra round trip)
+    RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+    RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024  # must be a multiple of 256 KiB
+
     def __init__(self):
+        settings = get_settings()
+        self.drive_folder_id = settings.GOOGLE_DRIVE_FOLDER_ID
+        self.gzip_uploads = settings.GOOGLE_DRIVE_GZIP_UPLOADS
+        self.sheet_id = settings.GOOGLE_SHEET_ID
+        self.sheet_range = settings.GOOGLE_SHEET_RANGE
         self._credentials = None
         self._drive_service = None
         self._sheets_service = None
+        self._local = threading.local()
+        # Long-lived upload pool: its threads, and the keep-alive transport
+        # each one holds in _local, are reused from cycle to cycle
+        self._upload_executor: ThreadPoolExecutor | None = None
+        # Credential file locations, remembered once found so re-initialising
+        # after token expiry doesn't re-stat every candidate path
+        self._token_path: str | None = None
+        self._sa_path: str | None = None
 
     def _ensure_initialized(self):
         """
@@ -46,12 +84,18 @@ class GoogleClient:
         1. OAuth2 User Credentials (token.json — works for Drive + Sheets)
         2. Interactive OAuth flow (credentials.json — first-time local setup)
         3. Service Account (ONLY if no OAuth available — Sheets only, Drive will fail)
+
+        Runs once per process: after the services are built, expired access
+        tokens are refreshed in place by the authorized transport on the next
+        request, so there's nothing to reload or rebuild.
         """
-        if self._credentials is not None and self._credentials.valid:
+        if self._drive_service is not None:
             return
 
         creds = None
-        token_path = _find_token_path()
+        if self._token_path is None:
+            self._token_path = _find_token_path()
+        token_path = self._token_path
 
         # 1. Try OAuth2 token.json first (works for both Drive and Sheets)
         if token_path:
@@ -63,8 +107,7 @@ class GoogleClient:
                     creds.refresh(Request())
                     # Save refreshed token (only if writable — Render /etc/secrets is read-only)
                     try:
-                        with open(token_path, "w") as f:
-                            f.write(creds.to_json())
+                        _write_token(token_path, creds)
                     except OSError:
                         logger.info("Token path is read-only, skipping save (normal on Render)")
                 if creds and creds.valid:
@@ -82,8 +125,8 @@ class GoogleClient:
                 )
                 creds = flow.run_local_server(port=0)
                 local_token = os.path.join(_BASE_DIR, "token.json")
-                with open(local_token, "w") as f:
-                    f.write(creds.to_json())
+                _write_token(local_token, creds)
+                self._token_path = local_token
                 logger.info(f"OAuth token saved to {local_token}")
             except Exception as e:
                 logger.warning(f"Interactive OAuth flow failed: {e}")
@@ -91,8 +134,12 @@ class GoogleClient:
 
         # 3. Fallback: Service Account (Sheets works, Drive uploads will fail)
         if not creds:
-            sa_path = settings.resolve_service_account_path()
-            if os.path.exists(sa_path):
+            if self._sa_path is None:
+                sa_path = get_settings().resolve_service_account_path()
+                if os.path.exists(sa_path):
+                    self._sa_path = sa_path
+            sa_path = self._sa_path
+            if sa_path:
                 try:
                     logger.warning(
                         "Using Service Account — Drive uploads will fail (no storage quota). "
@@ -116,67 +163,146 @@ class GoogleClient:
             raise RuntimeError(msg)
 
         self._credentials = creds
-        self._drive_service = build("drive", "v3", credentials=self._credentials)
-        self._sheets_service = build("sheets", "v4", credentials=self._credentials)
+        # Discovery documents bundled with google-api-python-client (>=2.0),
+        # so building the services makes no HTTPS request. Both services share
+        # this thread's keep-alive transport; worker threads pass their own.
+        http = self._thread_http()
+        self._drive_service = build(
+            "drive", "v3", http=http,
+            static_discovery=True, cache_discovery=False,
+        )
+        self._sheets_service = build(
+            "sheets", "v4", http=http,
+            static_discovery=True, cache_discovery=False,
+        )
         logger.info("Google client initialized successfully.")
 
+    def initialize(self):
+        """Load credentials and build the Drive/Sheets services up front."""
+        self._ensure_initialized()
+
+    def _thread_http(self) -> AuthorizedHttp:
+        """
+        Per-thread authorized transport, reused for every call made from that
+        thread. httplib2 isn't thread-safe, so concurrent uploads each execute
+        over their own keep-alive connections.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None or http.credentials is not self._credentials:
+            http = AuthorizedHttp(self._credentials, http=build_http())
+            self._local.http = http
+        return http
+
     def upload_transcript_to_drive(
-        self, filename: str, content: str, folder_id: str | None = None
+        self, filename: str, content: bytes, folder_id: str | None = None
     ) -> dict:
         """
-        Upload a .txt file to Google Drive.
+        Upload UTF-8 .txt content to Google Drive (as .txt.gz when gzip
+        uploads are on). Large payloads use a chunked resumable upload.
         Returns file metadata dict with 'id' and 'webViewLink'.
         """
         self._ensure_initialized()
-        folder_id = folder_id or settings.GOOGLE_DRIVE_FOLDER_ID
+        return self._upload(filename, content, folder_id or self.drive_folder_id)
+
+    def _upload(self, filename: str, content: bytes, folder_id: str) -> dict:
+        """Upload one file; the caller has already initialized the client."""
+        data = content
+        mimetype = "text/plain"
+        if self.gzip_uploads:
+            # mtime=0 keeps the output deterministic for identical transcripts
+            data = gzip.compress(data, mtime=0)
+            mimetype = "application/gzip"
+            filename = f"{filename}.gz"
 
         file_metadata = {
             "name": filename,
             "parents": [folder_id],
-            "mimeType": "text/plain",
+            "mimeType": mimetype,
         }
 
+        # BytesIO over an existing bytes object shares its buffer (no copy),
+        # so a fresh wrapper per upload is cheaper than a reused scratch buffer
+        resumable = len(data) > self.RESUMABLE_THRESHOLD
         media = MediaIoBaseUpload(
-            io.BytesIO(content.encode("utf-8")),
-            mimetype="text/plain",
-            resumable=False,
+            io.BytesIO(data),
+            mimetype=mimetype,
+            chunksize=self.RESUMABLE_CHUNK_SIZE,
+            resumable=resumable,
         )
 
-        file = (
-            self._drive_service.files()
-            .create(
-                body=file_metadata,
-                media_body=media,
-                fields="id, webViewLink, name",
-            )
-            .execute()
+        request = self._drive_service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields="id, webViewLink, name",
         )
+        http = self._thread_http()
+        if resumable:
+            file = None
+            while file is None:
+                _, file = request.next_chunk(http=http)
+        else:
+            file = request.execute(http=http)
 
         logger.info(f"Uploaded '{filename}' to Drive. ID: {file['id']}")
         return file
 
-    def append_to_sheet(self, date_str: str, content_link: str) -> dict:
+    def upload_transcripts_to_drive(
+        self, items: Iterable[tuple[str, bytes]], folder_id: str | None = None
+    ) -> list[dict | Exception]:
+        """
+        Upload several (filename, content) pairs to Google Drive concurrently.
+        Each upload starts as soon as its item is produced, so `items` may be a
+        generator that is still waiting on other work.
+        Results are in input order; a failed upload maps to its exception.
+        """
+        # Initialize once up front; the workers skip the check per upload
+        self._ensure_initialized()
+        folder_id = folder_id or self.drive_folder_id
+
+        def upload(item: tuple[str, bytes]):
+            try:
+                return self._upload(*item, folder_id)
+            except Exception as e:
+                return e
+
+        if self._upload_executor is None:
+            self._upload_executor = ThreadPoolExecutor(
+                max_workers=self.MAX_UPLOAD_WORKERS,
+                thread_name_prefix="drive-upload",
+            )
+        return list(self._upload_executor.map(upload, items))
+
+    def close(self):
+        """Shut down the upload pool and its threads' connections."""
+        if self._upload_executor is not None:
+            self._upload_executor.shutdown(wait=False)
+            self._upload_executor = None
+
+    def append_rows(self, rows: list[list[str]]) -> dict:
         """
-        Append a row [date, content_link] to the Google Sheet.
+        Append many [date, content_link] rows to the Google Sheet in one request.
         """
         self._ensure_initialized()
-        body = {"values": [[date_str, content_link]]}
+        body = {"values": rows}
 
         result = (
             self._sheets_service.spreadsheets()
             .values()
             .append(
-                spreadsheetId=settings.GOOGLE_SHEET_ID,
-                range=settings.GOOGLE_SHEET_RANGE,
+                spreadsheetId=self.sheet_id,
+                range=self.sheet_range,
                 valueInputOption="USER_ENTERED",
                 insertDataOption="INSERT_ROWS",
                 body=body,
             )
-            .execute()
+            .execute(http=self._thread_http())
         )
 
-        logger.info(f"Appended row to sheet: date={date_str}, link={content_link}")
+        logger.info(f"Appended {len(rows)} row(s) to sheet")
         return result
 
 
-google_client = GoogleClient()
+@lru_cache(maxsize=1)
+def get_google_client() -> GoogleClient:
+    """Shared GoogleClient, created on first use rather than at import."""
+    return GoogleClient()
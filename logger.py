@@ -30,11 +30,12 @@ def setup_logging(name="fathom_sync"):
         },
     ))
 
-    # File handler (rotating, 5MB, 5 backups)
+    # File handler (rotating, 5MB, 5 backups) — opened on first write
     file_handler = RotatingFileHandler(
         os.path.join(log_dir, "app.log"),
         maxBytes=5 * 1024 * 1024,
         backupCount=5,
+        delay=True,
     )
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(logging.Formatter(
@@ -47,3 +48,4 @@ def setup_logging(name="fathom_sync"):
 
 
 logger = setup_logging()
+
@@ -10,18 +10,28 @@ Usage: python main.py
 import sys
 import signal
 from apscheduler.schedulers.blocking import BlockingScheduler
-from config import settings
+from config import get_settings
+from fathom_client import get_fathom_client
+from google_client import get_google_client
 from logger import logger
 from sync import run_sync
 
 
 def main():
     logger.info("Fathom Sync Service starting up")
+    settings = get_settings()
+    settings.ensure_dirs()
 
     if not settings.FATHOM_API_KEY or "your_" in settings.FATHOM_API_KEY:
         logger.critical("FATHOM_API_KEY is not set or is a placeholder. Exiting.")
         sys.exit(1)
 
+    # Set up Google credentials and services once, before the first cycle
+    try:
+        get_google_client().initialize()
+    except Exception as e:
+        logger.error(f"Google client initialization failed (will retry on sync): {e}")
+
     # Run once immediately on startup
     logger.info("Running initial sync...")
     run_sync()
@@ -45,6 +55,8 @@ def main():
     def shutdown(signum, frame):
         logger.info("Shutdown signal received. Stopping scheduler...")
         scheduler.shutdown(wait=False)
+        get_fathom_client().close()
+        get_google_client().close()
         sys.exit(0)
 
     signal.signal(signal.SIGINT, shutdown)
@@ -1,44 +1,116 @@
-import json
 import os
-from config import settings
+import orjson
+from functools import lru_cache
+from config import get_settings
 from logger import logger
 
 
 class StateManager:
-    """Tracks which recording_ids have been processed via a JSON file."""
+    """
+    Tracks which recording_ids have been processed via a JSON file.
+    Each mark is appended as one line to a journal next to it (O(1), and
+    survives a crash mid-cycle); flush() folds the journal into the JSON
+    snapshot once per cycle.
+    """
 
     def __init__(self):
-        self.state_file = settings.STATE_FILE
+        self.state_file = get_settings().STATE_FILE
+        self.journal_file = f"{self.state_file}.journal"
+        self._dirty = False
         self.processed: dict = self._load()
+        self.processed_ids: set[str] = set(self.processed)
+        # Latest synced_at across all entries (ISO strings sort chronologically)
+        self.last_sync_at: str | None = max(
+            (entry.get("synced_at") or "" for entry in self.processed.values()),
+            default="",
+        ) or None
+        # In memory only: list everything on the first cycle after start-up
+        # and after a listing that stopped at a failed page
+        self.full_listing_needed = True
+        # In memory only: meetings the last cycle left unprocessed (no
+        # transcript yet, failed fetch/upload), retried on the next cycle
+        self.unfinished: dict[str, dict] = {}
+        # Fold any replayed journal into the snapshot now, so new marks
+        # aren't appended after a torn final line
+        self.flush()
 
     def _load(self) -> dict:
+        processed = {}
         if os.path.exists(self.state_file):
             try:
-                with open(self.state_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                with open(self.state_file, "rb") as f:
+                    processed = orjson.loads(f.read())
             except Exception as e:
                 logger.warning(f"Failed to load state file: {e}")
-        return {}
+        if os.path.exists(self.journal_file):
+            # Replay marks from a cycle that never reached flush()
+            try:
+                with open(self.journal_file, "rb") as f:
+                    for line in f:
+                        try:
+                            entry = orjson.loads(line)
+                        except ValueError:
+                            continue  # torn final line from a crash
+                        processed[entry.pop("recording_id")] = entry
+                self._dirty = True
+            except Exception as e:
+                logger.warning(f"Failed to replay state journal: {e}")
+        return processed
 
-    def _save(self):
+    def _save(self) -> bool:
+        # Write-then-rename so a crash mid-write can't truncate the state file
+        tmp = f"{self.state_file}.tmp"
         try:
-            with open(self.state_file, "w", encoding="utf-8") as f:
-                json.dump(self.processed, f, indent=2, default=str)
+            with open(tmp, "wb") as f:
+                f.write(orjson.dumps(
+                    self.processed,
+                    default=str,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                ))
+            os.replace(tmp, self.state_file)
         except Exception as e:
             logger.error(f"Failed to save state file: {e}")
+            return False
+        return True
+
+    def _append_journal(self, recording_id: str, entry: dict):
+        try:
+            with open(self.journal_file, "ab") as f:
+                f.write(orjson.dumps({"recording_id": recording_id, **entry}) + b"\n")
+        except Exception as e:
+            logger.error(f"Failed to append to state journal: {e}")
 
-    def is_processed(self, recording_id: str) -> bool:
-        return str(recording_id) in self.processed
+    def flush(self):
+        """Fold marks made since the last flush into the snapshot, if any."""
+        if self._dirty and self._save():
+            self._dirty = False
+            try:
+                os.remove(self.journal_file)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to clear state journal: {e}")
 
+    # recording_ids are normalized to str by the caller (run_sync), which
+    # checks them against processed_ids directly
     def mark_processed(self, recording_id: str, drive_file_id: str, synced_at: str):
-        self.processed[str(recording_id)] = {
+        assert isinstance(recording_id, str), recording_id
+        entry = {
             "drive_file_id": drive_file_id,
             "synced_at": synced_at,
         }
-        self._save()
+        self.processed[recording_id] = entry
+        self.processed_ids.add(recording_id)
+        if not self.last_sync_at or synced_at > self.last_sync_at:
+            self.last_sync_at = synced_at
+        self._append_journal(recording_id, entry)
+        self._dirty = True
 
     def get_processed_count(self) -> int:
         return len(self.processed)
 
 
-state_manager = StateManager()
+@lru_cache(maxsize=1)
+def get_state_manager() -> StateManager:
+    """Shared StateManager; the state file is read on first use, not at import."""
+    return StateManager()
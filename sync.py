@@ -1,51 +1,64 @@
+import sys
 import time
 import requests
-from datetime import datetime
-from tenacity import RetryError
-from fathom_client import fathom_client
-from google_client import google_client
-from state import state_manager
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from config import get_settings
+from fathom_client import get_fathom_client
+from google_client import get_google_client
+from state import get_state_manager
 from logger import logger
 
+_RULE = b"=" * 50 + b"\n"
 
-def format_transcript(title: str, meeting: dict, transcript_data: dict) -> str:
+if sys.version_info >= (3, 11):
+    # Accepts the trailing "Z" natively
+    _parse_iso = datetime.fromisoformat
+else:
+    def _parse_iso(raw: str) -> datetime:
+        return datetime.fromisoformat(raw.replace("Z", "+00:00"))
+
+
+def format_transcript(title: str, meeting: dict, transcript_data: dict) -> bytes:
     """
-    Format a Fathom transcript into a readable .txt string.
+    Format a Fathom transcript into readable UTF-8 .txt content.
+    Lines are encoded straight into one buffer rather than joined into a
+    str and encoded afterwards.
     """
     start_time = meeting.get("recording_start_time") or meeting.get("created_at") or ""
     end_time = meeting.get("recording_end_time") or ""
 
     # Build participant list from calendar_invitees
-    participants = []
-    for invitee in meeting.get("calendar_invitees") or []:
-        name = invitee.get("name") or invitee.get("email") or "Unknown"
-        participants.append(name)
+    participants = ", ".join(
+        invitee.get("name") or invitee.get("email") or "Unknown"
+        for invitee in meeting.get("calendar_invitees") or ()
+    )
 
     # Header
-    lines = [
-        "=" * 50,
-        f"Meeting: {title}",
-        f"Date: {start_time}",
-    ]
+    buf = bytearray(_RULE)
+    buf += f"Meeting: {title}\nDate: {start_time}\n".encode("utf-8")
     if start_time and end_time:
-        lines.append(f"Recording: {start_time} to {end_time}")
+        buf += f"Recording: {start_time} to {end_time}\n".encode("utf-8")
     if participants:
-        lines.append(f"Participants: {', '.join(participants)}")
-    lines.append("=" * 50)
-    lines.append("")
+        buf += f"Participants: {participants}\n".encode("utf-8")
+    buf += _RULE
+    buf += b"\n"
 
-    # Transcript body
+    # Transcript body — str.join sizes its result once from the list, so the
+    # body is built in one allocation and encoded in a single pass
     if transcript_data and "transcript" in transcript_data:
-        for entry in transcript_data["transcript"]:
-            speaker = entry.get("speaker", {}).get("display_name", "Unknown")
-            text = entry.get("text", "")
-            timestamp = entry.get("timestamp", "")
-            lines.append(f"[{timestamp}] {speaker}: {text}")
+        buf += "".join([
+            f"[{entry.get('timestamp', '')}] "
+            f"{entry.get('speaker', {}).get('display_name', 'Unknown')}: "
+            f"{entry.get('text', '')}\n"
+            for entry in transcript_data["transcript"]
+        ]).encode("utf-8")
     else:
-        lines.append("[No transcript content available]")
+        buf += b"[No transcript content available]\n"
 
-    lines.append("")
-    return "\n".join(lines)
+    # One copy out of the bytearray here; the upload's BytesIO then shares
+    # this bytes buffer without copying (it would copy a bytearray)
+    return bytes(buf)
 
 
 def extract_call_date(meeting: dict) -> str:
@@ -63,96 +76,101 @@ def extract_call_date(meeting: dict) -> str:
         return datetime.now().strftime("%Y-%m-%d %H:%M")
 
     try:
-        dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        dt = _parse_iso(raw)
         return dt.strftime("%d %b %Y, %I:%M %p")
-    except (ValueError, AttributeError):
+    except (ValueError, TypeError, AttributeError):
         return raw
 
 
+# Deletes every ASCII character that isn't alphanumeric or a space
+_FILENAME_STRIP = str.maketrans(
+    "", "", "".join(c for c in map(chr, range(128)) if not (c.isalnum() or c == " "))
+)
+
+
 def make_filename(recording_id, title: str) -> str:
     """Create a safe filename: '118794290_unga_bunga.txt'."""
-    safe = "".join(c if c.isalnum() or c == " " else "" for c in title).strip()
-    safe = safe.replace(" ", "_")
+    safe = title.translate(_FILENAME_STRIP)
+    if not safe.isascii():
+        # Keep the same Unicode-aware rule (isalnum) for non-ASCII titles
+        safe = "".join(c for c in safe if c.isalnum() or c == " ")
+    safe = safe.strip().replace(" ", "_")
     if not safe:
         safe = "untitled"
     return f"{recording_id}_{safe}.txt"
 
 
-def run_sync():
+def _flush_sheet_rows(pending: list[tuple[str, str, list[str]]], stats: dict):
     """
-    Main sync flow:
-    1. List all meetings from Fathom
-    2. For each unprocessed meeting:
-       a. Fetch transcript
-       b. Format as text
-       c. Upload .txt to Google Drive
-       d. Append [date, drive_link] row to Google Sheet
-       e. Mark as processed
+    Append all pending rows to the sheet in one call, then mark those meetings
+    processed. If the append fails they stay unprocessed and are retried next cycle.
     """
-    logger.info("=" * 40)
-    logger.info("Starting sync cycle")
-    logger.info("=" * 40)
-
-    stats = {"new": 0, "skipped": 0, "errors": 0}
+    if not pending:
+        return
 
+    google_client = get_google_client()
+    state_manager = get_state_manager()
     try:
-        meetings = fathom_client.list_meetings()
+        google_client.append_rows([row for _, _, row in pending])
     except Exception as e:
-        logger.error(f"Failed to fetch meetings from Fathom: {e}")
-        return stats
+        logger.error(f"Failed to append {len(pending)} row(s) to sheet: {e}")
+        stats["new"] -= len(pending)
+        stats["errors"] += len(pending)
+        return
 
-    if not meetings:
-        logger.info("No meetings found.")
-        return stats
+    synced_at = datetime.now().isoformat()
+    for recording_id, drive_file_id, _ in pending:
+        state_manager.mark_processed(
+            recording_id,
+            drive_file_id=drive_file_id,
+            synced_at=synced_at,
+        )
 
-    logger.info(
-        f"Found {len(meetings)} total meetings, "
-        f"{state_manager.get_processed_count()} already processed"
-    )
 
-    # Count how many are new before processing
-    new_meetings = [
-        m for m in meetings
-        if str(m.get("recording_id", ""))
-        and not state_manager.is_processed(str(m.get("recording_id", "")))
-    ]
-    stats["skipped"] = len(meetings) - len(new_meetings)
-    logger.info(f"{len(new_meetings)} new meetings to process, {stats['skipped']} already done")
-
-    for idx, meeting in enumerate(new_meetings, 1):
-        recording_id = str(meeting.get("recording_id", ""))
+def _prepare_uploads(
+    meetings_by_id: dict[str, dict],
+    transcripts: Iterator[tuple[str, dict | Exception]],
+    stats: dict,
+) -> Iterator[tuple[str, str, dict, str, bytes]]:
+    """
+    Check each transcript as it arrives and format it for upload.
+    Yields (recording_id, title, meeting, filename, content) tuples.
+    """
+    state_manager = get_state_manager()
+    for idx, (recording_id, transcript_data) in enumerate(transcripts, 1):
+        meeting = meetings_by_id[recording_id]
         title = meeting.get("title") or meeting.get("meeting_title") or "Untitled Meeting"
-        logger.info(f"[{idx}/{len(new_meetings)}] Processing: '{title}' (recording_id={recording_id})")
+        logger.info(
+            "[%d/%d] Processing: '%s' (recording_id=%s)",
+            idx, len(meetings_by_id), title, recording_id,
+        )
 
-        try:
-            # Fetch transcript — handle HTTP errors for old/unavailable recordings
-            try:
-                transcript_data = fathom_client.get_transcript(recording_id)
-            except RetryError:
-                logger.warning(
-                    f"Transcript unavailable for '{title}' ({recording_id}). "
-                    f"Skipping — recording may be too old or deleted."
-                )
-                # Mark as processed so we don't retry forever
-                state_manager.mark_processed(
-                    recording_id,
-                    drive_file_id="N/A",
-                    synced_at=datetime.now().isoformat(),
-                )
-                stats["errors"] += 1
-                continue
-            except requests.HTTPError as e:
-                logger.warning(
-                    f"HTTP {e.response.status_code} for transcript '{title}' ({recording_id}). Skipping."
-                )
-                state_manager.mark_processed(
-                    recording_id,
-                    drive_file_id="N/A",
-                    synced_at=datetime.now().isoformat(),
-                )
-                stats["errors"] += 1
-                continue
+        # Failed fetches arrive as exceptions. A 4xx means the recording is
+        # old/unavailable; 429 and 5xx that outlast the session's retries
+        # surface as RetryError and fall through to be retried next cycle.
+        if (
+            isinstance(transcript_data, requests.HTTPError)
+            and 400 <= transcript_data.response.status_code < 500
+        ):
+            logger.warning(
+                "HTTP %s for transcript '%s' (%s). "
+                "Skipping — recording may be too old or deleted.",
+                transcript_data.response.status_code, title, recording_id,
+            )
+            # Mark as processed so we don't retry forever
+            state_manager.mark_processed(
+                recording_id,
+                drive_file_id="N/A",
+                synced_at=datetime.now().isoformat(),
+            )
+            stats["errors"] += 1
+            continue
+        if isinstance(transcript_data, Exception):
+            logger.error("Error processing '%s' (%s): %s", title, recording_id, transcript_data)
+            stats["errors"] += 1
+            continue
 
+        try:
             has_content = (
                 transcript_data
                 and "transcript" in transcript_data
@@ -160,46 +178,175 @@ def run_sync():
             )
             if not has_content:
                 logger.warning(
-                    f"No transcript content for '{title}' ({recording_id}). "
-                    f"Skipping — may not be ready yet."
+                    "No transcript content for '%s' (%s). "
+                    "Skipping — may not be ready yet.",
+                    title, recording_id,
                 )
                 stats["errors"] += 1
                 continue
 
             # Format transcript text
-            text_content = format_transcript(title, meeting, transcript_data)
+            content = format_transcript(title, meeting, transcript_data)
             filename = make_filename(recording_id, title)
+        except Exception as e:
+            logger.error("Error processing '%s' (%s): %s", title, recording_id, e)
+            stats["errors"] += 1
+            continue
 
-            # Upload to Google Drive
-            drive_file = google_client.upload_transcript_to_drive(filename, text_content)
-            drive_link = drive_file.get("webViewLink", "")
-            drive_file_id = drive_file.get("id", "")
-
-            if not drive_link:
-                logger.warning(
-                    f"Drive upload succeeded but no webViewLink for {recording_id}"
-                )
+        yield recording_id, title, meeting, filename, content
 
-            # Extract call date for sheet
-            call_date = extract_call_date(meeting)
 
-            # Append row to Google Sheet
-            google_client.append_to_sheet(call_date, drive_link)
+def _upload_meetings(
+    prepared_iter: Iterator[tuple[str, str, dict, str, bytes]],
+    pending: list,
+    stats: dict,
+):
+    """
+    Upload transcripts to Drive as they are prepared, so uploads overlap with
+    the remaining transcript fetches. Sheet rows are queued in `pending`.
+    """
+    prepared = []
 
-            # Mark as processed
-            state_manager.mark_processed(
-                recording_id,
-                drive_file_id=drive_file_id,
-                synced_at=datetime.now().isoformat(),
-            )
+    def upload_items():
+        for recording_id, title, meeting, filename, content in prepared_iter:
+            prepared.append((recording_id, title, meeting))
+            yield filename, content
 
-            stats["new"] += 1
-            logger.info(f"Synced '{title}' -> {drive_link}")
+    try:
+        results = get_google_client().upload_transcripts_to_drive(upload_items())
+    except Exception as e:
+        # Still check and count every remaining meeting
+        for _ in upload_items():
+            pass
+        if prepared:
+            logger.error(f"Failed to upload {len(prepared)} transcript(s) to Drive: {e}")
+            stats["errors"] += len(prepared)
+        return
 
-        except Exception as e:
-            logger.error(f"Error processing '{title}' ({recording_id}): {e}")
+    for (recording_id, title, meeting), drive_file in zip(prepared, results):
+        if isinstance(drive_file, Exception):
+            logger.error("Error uploading '%s' (%s): %s", title, recording_id, drive_file)
             stats["errors"] += 1
             continue
 
+        drive_link = drive_file.get("webViewLink", "")
+        drive_file_id = drive_file.get("id", "")
+
+        if not drive_link:
+            logger.warning(
+                "Drive upload succeeded but no webViewLink for %s", recording_id
+            )
+
+        # Extract call date for sheet
+        call_date = extract_call_date(meeting)
+
+        # Queue row for the Google Sheet; marked processed once it's appended
+        pending.append((recording_id, drive_file_id, [call_date, drive_link]))
+
+        stats["new"] += 1
+        logger.info("Uploaded '%s' -> %s", title, drive_link)
+
+
+def _listing_since(state_manager) -> str | None:
+    """
+    created_after filter for the meetings listing: the last sync, or the
+    oldest unfinished meeting if earlier, minus the lookback window, as UTC
+    ISO-8601. None means list everything.
+    """
+    if state_manager.full_listing_needed or not state_manager.last_sync_at:
+        return None
+    try:
+        # synced_at is naive local time; astimezone() treats it as such
+        since = datetime.fromisoformat(state_manager.last_sync_at).astimezone()
+    except ValueError:
+        return None
+    for meeting in state_manager.unfinished.values():
+        try:
+            since = min(since, _parse_iso(meeting["created_at"]))
+        except (KeyError, ValueError, TypeError):
+            continue  # still retried from memory, just not relisted
+    since -= timedelta(hours=get_settings().FATHOM_LISTING_LOOKBACK_HOURS)
+    return since.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def run_sync():
+    """
+    Main sync flow:
+    1. List meetings from Fathom (created since the last sync or the oldest
+       unfinished meeting, once a complete listing has been seen), plus the
+       meetings the last cycle left unfinished
+    2. Fetch transcripts for all unprocessed meetings concurrently
+    3. Format each transcript as text as soon as it arrives
+    4. Upload each .txt file to Google Drive concurrently, overlapping
+       with the remaining fetches
+    5. Append all [date, drive_link] rows to the Google Sheet in one call
+    6. Mark the appended meetings as processed
+    """
+    logger.info("=" * 40)
+    logger.info("Starting sync cycle")
+    logger.info("=" * 40)
+
+    stats = {"new": 0, "skipped": 0, "errors": 0}
+    fathom_client = get_fathom_client()
+    state_manager = get_state_manager()
+
+    if state_manager.full_listing_needed:
+        # No If-None-Match either: a 304 would end the full listing early
+        fathom_client.clear_etags()
+    try:
+        meetings = fathom_client.list_meetings(created_after=_listing_since(state_manager))
+    except Exception as e:
+        logger.error(f"Failed to fetch meetings from Fathom: {e}")
+        return stats
+
+    state_manager.full_listing_needed = not fathom_client.listing_complete
+    if not meetings and not state_manager.unfinished:
+        logger.info("No meetings found.")
+        return stats
+
+    logger.info(
+        f"Found {len(meetings)} total meetings, "
+        f"{state_manager.get_processed_count()} already processed"
+    )
+
+    # Count how many are new before processing. recording_id is normalized
+    # to str here, once; everything downstream relies on that.
+    # Steady-state cycles are almost all already-processed meetings, so this
+    # is a bare set lookup per meeting — nothing else is resolved or logged.
+    processed_ids = state_manager.processed_ids
+    meetings_by_id = {}
+    for m in meetings:
+        recording_id = str(m.get("recording_id") or "")
+        if recording_id and recording_id not in processed_ids:
+            meetings_by_id[recording_id] = m
+    stats["skipped"] = len(meetings) - len(meetings_by_id)
+    # Unfinished meetings a 304 or created_after kept out of this listing
+    for recording_id, m in state_manager.unfinished.items():
+        if recording_id not in processed_ids:
+            meetings_by_id.setdefault(recording_id, m)
+    logger.info(f"{len(meetings_by_id)} new meetings to process, {stats['skipped']} already done")
+
+    transcripts = fathom_client.iter_transcripts(list(meetings_by_id))
+
+    # Uploaded meetings waiting on the single end-of-cycle sheet append:
+    # (recording_id, drive_file_id, [call_date, drive_link])
+    pending: list[tuple[str, str, list[str]]] = []
+    try:
+        if meetings_by_id:
+            prepared = _prepare_uploads(meetings_by_id, transcripts, stats)
+            _upload_meetings(prepared, pending, stats)
+    finally:
+        _flush_sheet_rows(pending, stats)
+        state_manager.flush()
+
+    # Whatever wasn't marked processed is retried next cycle, whether or not
+    # the listing shows it again (404s were marked N/A and drop out here)
+    state_manager.unfinished = {
+        recording_id: m
+        for recording_id, m in meetings_by_id.items()
+        if recording_id not in processed_ids
+    }
+
     logger.info(f"Sync cycle complete. Stats: {stats}")
     return stats
+